@@ -54,6 +54,9 @@ app.config['MAX_CONTENT_LENGTH'] = 32 * 1024 * 1024  # 32MB max file size
 app.config['TEMPLATES_AUTO_RELOAD'] = False  # Disable in production
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 300  # 5 minutes cache
 
+# Image suffixes counted on the dashboard (compared case-insensitively)
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg'})
+
 # Thread pool for background tasks
 from concurrent.futures import ThreadPoolExecutor
 executor = ThreadPoolExecutor(max_workers=3)
@@ -131,9 +134,12 @@ def get_system_status():
     from pathlib import Path
     images_dir = Path('images')
     if images_dir.exists():
-        png_files = len(list(images_dir.glob('*.png')))
-        jpg_files = len(list(images_dir.glob('*.jpg'))) + len(list(images_dir.glob('*.jpeg')))
-        total_files = png_files + jpg_files
+        # Single directory pass filtered by extension instead of one glob per extension
+        with os.scandir(images_dir) as entries:
+            total_files = sum(
+                1 for entry in entries
+                if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+            )
     else:
         total_files = 0
     status['generated_images'] = total_files
@@ -35,6 +35,12 @@ except ImportError:
     print("Error: watermark.py module not found. Make sure it's in the same directory.")
     sys.exit(1)
 
+# Image file suffixes picked up by find_images (compared case-insensitively)
+IMAGE_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg"})
+
+# Maximum number of paths passed to a single `git rm` invocation
+GIT_RM_BATCH_SIZE = 500
+
 class WatermarkWorkflow:
     def __init__(self, watermark_path="Fortuna_Bound_Watermark.png", 
                  images_dir="images", platform="generic"):
@@ -45,11 +51,13 @@ class WatermarkWorkflow:
     
     def find_images(self, include_watermarked=True) -> List[Path]:
         """Find all image files in the images directory"""
-        extensions = ["*.png", "*.jpg", "*.jpeg", "*.PNG", "*.JPG", "*.JPEG"]
         images = []
         
-        for ext in extensions:
-            images.extend(self.images_dir.rglob(ext))
+        # Single scandir-backed walk instead of one rglob per extension
+        for root, _dirs, files in os.walk(self.images_dir):
+            for name in files:
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                    images.append(Path(root) / name)
         
         # Filter out watermark files themselves
         images = [img for img in images if "Fortuna_Bound_Watermark" not in str(img)]
@@ -119,41 +127,65 @@ class WatermarkWorkflow:
         
         # Find non-watermarked images
         non_watermarked = self.find_images(include_watermarked=False)
-        removed_files = []
-        
+        to_remove = []
+
         for img_path in non_watermarked:
+            # Check if there's a watermarked version
+            base_path = str(img_path).replace(".png", "").replace(".jpg", "").replace(".jpeg", "")
+            watermarked_variants = [
+                base_path + "_watermarked.png",
+                base_path + "_watermarked.jpg",
+                base_path + "_watermarked.jpeg"
+            ]
+
+            if any(Path(wm).exists() for wm in watermarked_variants):
+                self.logger.info(f"Removing non-watermarked: {img_path}")
+                to_remove.append(img_path)
+
+        # Remove tracked files with one `git rm` per batch instead of one
+        # process per image; --ignore-unmatch leaves untracked files in place
+        removed_files = []
+        for start in range(0, len(to_remove), GIT_RM_BATCH_SIZE):
+            batch = to_remove[start:start + GIT_RM_BATCH_SIZE]
             try:
-                # Check if there's a watermarked version
-                base_path = str(img_path).replace(".png", "").replace(".jpg", "").replace(".jpeg", "")
-                watermarked_variants = [
-                    base_path + "_watermarked.png",
-                    base_path + "_watermarked.jpg",
-                    base_path + "_watermarked.jpeg"
-                ]
-                
-                has_watermarked_version = any(Path(wm).exists() for wm in watermarked_variants)
-                
-                if has_watermarked_version:
-                    self.logger.info(f"Removing non-watermarked: {img_path}")
-                    
-                    # Remove from git if tracked
-                    try:
-                        subprocess.run(["git", "rm", str(img_path)], 
-                                     capture_output=True, check=True)
-                        self.logger.info(f"✓ Removed from git: {img_path}")
-                    except subprocess.CalledProcessError:
-                        # File might not be tracked, just remove locally
+                self._git_rm(batch)
+                batch_failed = False
+            except subprocess.CalledProcessError as e:
+                # git rm is all-or-nothing, so one modified file fails the whole
+                # batch; retry per file so only that file falls back to unlink()
+                self.logger.warning(f"git rm failed for batch, retrying files individually: {e}")
+                batch_failed = True
+            except OSError as e:
+                # git missing or not a repository: leave these files untouched
+                for img_path in batch:
+                    self.logger.error(f"✗ Error removing {img_path}: {e}")
+                continue
+
+            for img_path in batch:
+                try:
+                    if batch_failed:
+                        try:
+                            self._git_rm([img_path])
+                        except subprocess.CalledProcessError:
+                            pass  # Fall back to local removal below
+                    if img_path.exists():
+                        # File was not tracked (or git refused it), just remove locally
                         img_path.unlink()
                         self.logger.info(f"✓ Removed locally: {img_path}")
-                    
+                    else:
+                        self.logger.info(f"✓ Removed from git: {img_path}")
                     removed_files.append(str(img_path))
-                    
-            except Exception as e:
-                self.logger.error(f"✗ Error removing {img_path}: {e}")
-        
+                except Exception as e:
+                    self.logger.error(f"✗ Error removing {img_path}: {e}")
+
         self.logger.info(f"Cleaned up {len(removed_files)} non-watermarked images")
         return removed_files
     
+    def _git_rm(self, paths: List[Path]):
+        """Remove paths from git (and the worktree); untracked paths are ignored"""
+        subprocess.run(["git", "rm", "-q", "--ignore-unmatch", "--"] + [str(p) for p in paths],
+                       capture_output=True, check=True)
+    
     def check_git_sync(self) -> Dict[str, any]:
         """Check git sync status and identify cleanup opportunities"""
         self.logger.info("Checking git sync status")
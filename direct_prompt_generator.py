@@ -17,70 +17,95 @@ import os
 from typing import Optional, Dict
 from datetime import datetime
 
-# Import our mantra generator
-try:
-    from mantra_generator import MantraGenerator
-except ImportError:
-    print("Error: mantra_generator.py not found")
-    sys.exit(1)
-
 class DirectPromptGenerator:
+    # Style presets for different themes (class-level so the CLI can read them
+    # without building an instance)
+    STYLE_PRESETS = {
+        "luxury": "luxury lifestyle photography, elegant composition, premium lighting, sophisticated aesthetics",
+        "business": "professional photography, corporate setting, clean composition, modern business aesthetic",
+        "wellness": "serene atmosphere, natural lighting, calming composition, mindful aesthetic",
+        "success": "aspirational photography, achievement theme, confident composition, success aesthetic",
+        "nature": "natural photography, organic composition, environmental lighting, peaceful aesthetic",
+        "urban": "urban photography, city aesthetic, modern composition, metropolitan style",
+        "minimal": "minimalist photography, clean lines, simple composition, elegant restraint",
+        "artistic": "creative photography, artistic composition, unique perspective, expressive style"
+    }
+    
+    # Platform-specific optimizations
+    PLATFORM_SPECS = {
+        "ig": {"name": "Instagram", "optimal_ratios": ["1:1", "4:5", "9:16"], "style": "vibrant, engaging"},
+        "tt": {"name": "TikTok", "optimal_ratios": ["9:16", "1:1"], "style": "dynamic, eye-catching"},
+        "tw": {"name": "Twitter", "optimal_ratios": ["16:9", "2:1"], "style": "professional, clear"},
+        "li": {"name": "LinkedIn", "optimal_ratios": ["1.91:1", "1:1"], "style": "professional, business-focused"},
+        "fb": {"name": "Facebook", "optimal_ratios": ["1.91:1", "1:1"], "style": "engaging, social"}
+    }
+    
     def __init__(self):
-        self.mantra_gen = MantraGenerator()
-        
-        # Style presets for different themes
-        self.style_presets = {
-            "luxury": "luxury lifestyle photography, elegant composition, premium lighting, sophisticated aesthetics",
-            "business": "professional photography, corporate setting, clean composition, modern business aesthetic",
-            "wellness": "serene atmosphere, natural lighting, calming composition, mindful aesthetic",
-            "success": "aspirational photography, achievement theme, confident composition, success aesthetic",
-            "nature": "natural photography, organic composition, environmental lighting, peaceful aesthetic",
-            "urban": "urban photography, city aesthetic, modern composition, metropolitan style",
-            "minimal": "minimalist photography, clean lines, simple composition, elegant restraint",
-            "artistic": "creative photography, artistic composition, unique perspective, expressive style"
-        }
+        # MantraGenerator is created on first use (see mantra_gen) so style
+        # listing and plain enhance_prompt calls don't pay for importing it;
+        # previews still need it for the mantra category recommendations
+        self._mantra_gen = None
         
-        # Platform-specific optimizations
-        self.platform_specs = {
-            "ig": {"name": "Instagram", "optimal_ratios": ["1:1", "4:5", "9:16"], "style": "vibrant, engaging"},
-            "tt": {"name": "TikTok", "optimal_ratios": ["9:16", "1:1"], "style": "dynamic, eye-catching"},
-            "tw": {"name": "Twitter", "optimal_ratios": ["16:9", "2:1"], "style": "professional, clear"},
-            "li": {"name": "LinkedIn", "optimal_ratios": ["1.91:1", "1:1"], "style": "professional, business-focused"},
-            "fb": {"name": "Facebook", "optimal_ratios": ["1.91:1", "1:1"], "style": "engaging, social"}
-        }
-    
-    def enhance_prompt(self, base_prompt: str, style: Optional[str] = None, 
-                      platform: str = "ig", mantra: Optional[str] = None) -> str:
-        """Enhance a basic prompt with style and technical specifications"""
+        # Per-instance copies of the class-level tables, so one generator can't
+        # change another's. Treat them as read-only after construction:
+        # _prompt_tail caches text built from them
+        self.style_presets = dict(self.STYLE_PRESETS)
+        self.platform_specs = {k: dict(v) for k, v in self.PLATFORM_SPECS.items()}
         
-        # Start with base prompt
-        enhanced = base_prompt.strip()
+        # Prompt suffixes keyed by (style, platform); they don't depend on the base prompt
+        self._tail_cache: Dict[tuple, str] = {}
+    
+    @property
+    def mantra_gen(self):
+        """Mantra generator, imported and instantiated on first access"""
+        if self._mantra_gen is None:
+            try:
+                from mantra_generator import MantraGenerator
+            except ImportError:
+                print("Error: mantra_generator.py not found")
+                sys.exit(1)
+            self._mantra_gen = MantraGenerator()
+        return self._mantra_gen
+    
+    def _prompt_tail(self, style: Optional[str], platform: str) -> str:
+        """Build (once per style/platform pair) the suffix appended by enhance_prompt"""
+        key = (style, platform)
+        cached = self._tail_cache.get(key)
+        if cached is not None:
+            return cached
         
         # Add explicit no-text directive since we add mantras via watermarking
-        enhanced += ", no text, no writing, no words, no typography, no signs"
+        tail = ", no text, no writing, no words, no typography, no signs"
         
         # Add style preset if specified
-        if style and style in self.style_presets:
-            enhanced += f", {self.style_presets[style]}"
+        style_text = self.style_presets.get(style) if style else None
+        if style_text:
+            tail += f", {style_text}"
         
         # Add platform optimization
-        if platform in self.platform_specs:
-            platform_style = self.platform_specs[platform]["style"]
-            enhanced += f", {platform_style} composition"
+        platform_spec = self.platform_specs.get(platform)
+        if platform_spec:
+            tail += f", {platform_spec['style']} composition"
         
         # Add technical specifications
-        enhanced += ", Canon EOS R5 35mm f/1.8 ISO 200, professional lighting"
+        tail += ", Canon EOS R5 35mm f/1.8 ISO 200, professional lighting"
         
         # Add color harmony
-        enhanced += ", harmonious color palette, refined aesthetics"
-        
-        # NOTE: We don't add text overlay in the prompt since we add mantras via watermarking
-        # The mantra parameter is kept for compatibility but not used in prompt
+        tail += ", harmonious color palette, refined aesthetics"
         
         # Add aspect ratio note
-        enhanced += ", commercial photography style"
+        tail += ", commercial photography style"
         
-        return enhanced
+        self._tail_cache[key] = tail
+        return tail
+    
+    def enhance_prompt(self, base_prompt: str, style: Optional[str] = None, 
+                      platform: str = "ig", mantra: Optional[str] = None) -> str:
+        """Enhance a basic prompt with style and technical specifications"""
+        
+        # NOTE: We don't add text overlay in the prompt since we add mantras via watermarking
+        # The mantra parameter is kept for compatibility but not used in prompt
+        return base_prompt.strip() + self._prompt_tail(style, platform)
     
     def generate_with_mantra(self, prompt: str, mantra_category: Optional[str] = None, 
                            custom_mantra: Optional[str] = None, count: int = 1) -> Dict:
@@ -100,9 +125,13 @@ class DirectPromptGenerator:
             mantra_options = self.mantra_gen.generate_mantra_options(None, count)
             mantras = mantra_options["options"]
         
+        # The enhanced prompt doesn't depend on the mantra, so build it once;
+        # all results in a batch share one timestamp
+        enhanced_prompt = self.enhance_prompt(prompt)
+        timestamp = datetime.now().isoformat()
+        
         for i, mantra_data in enumerate(mantras):
             mantra_text = mantra_data["text"]
-            enhanced_prompt = self.enhance_prompt(prompt, mantra=mantra_text)
             
             result = {
                 "id": i + 1,
@@ -113,7 +142,7 @@ class DirectPromptGenerator:
                     "category": mantra_data.get("category", "unknown"),
                     "preview": self.mantra_gen.preview_text_placement(mantra_text)
                 },
-                "timestamp": datetime.now().isoformat()
+                "timestamp": timestamp
             }
             results.append(result)
         
@@ -128,20 +157,22 @@ class DirectPromptGenerator:
         """Preview what will be generated without actually creating image"""
         
         enhanced_prompt = self.enhance_prompt(prompt, style, platform)
+        platform_spec = self.platform_specs.get(platform)
         
+        # Hand out copies so callers can't edit the tables behind the tail cache
         return {
             "preview": {
                 "base_prompt": prompt,
                 "enhanced_prompt": enhanced_prompt,
                 "style": style or "default",
-                "platform": self.platform_specs.get(platform, {"name": platform}),
+                "platform": dict(platform_spec) if platform_spec else {"name": platform},
                 "aspect_ratio": aspect_ratio,
                 "estimated_length": len(enhanced_prompt),
                 "word_count": len(enhanced_prompt.split()),
                 "timestamp": datetime.now().isoformat()
             },
             "recommendations": {
-                "optimal_ratios": self.platform_specs.get(platform, {}).get("optimal_ratios", ["4:5"]),
+                "optimal_ratios": list(platform_spec["optimal_ratios"]) if platform_spec else ["4:5"],
                 "style_suggestions": list(self.style_presets.keys()),
                 "mantra_categories": self.mantra_gen.get_all_categories()
             }
@@ -150,7 +181,7 @@ class DirectPromptGenerator:
 def main():
     parser = argparse.ArgumentParser(description="Generate images directly from custom prompts")
     parser.add_argument("prompt", help="Base image prompt/description")
-    parser.add_argument("--style", choices=list(DirectPromptGenerator().style_presets.keys()),
+    parser.add_argument("--style", choices=list(DirectPromptGenerator.STYLE_PRESETS.keys()),
                        help="Style preset to apply")
     parser.add_argument("--platform", choices=["ig", "tt", "tw", "li", "fb"], default="ig",
                        help="Target platform for optimization")
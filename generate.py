@@ -99,10 +99,11 @@ def download_image(url: str, output_path: str) -> bool:
         output_path_obj = Path(output_path)
         output_path_obj.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_path, "wb") as f:
+        with output_path_obj.open("wb") as f:
             f.write(response.content)
+            size_kb = f.tell() / 1024
         
-        logger.info(f"Successfully downloaded image to {output_path}")
+        logger.info(f"Successfully downloaded image to {output_path} ({size_kb:.1f} KB)")
         return True
         
     except requests.RequestException as e:
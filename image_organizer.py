@@ -97,11 +97,12 @@ class ImageOrganizer:
             print(f"OCR error for {image_path}: {e}")
             return ""
     
-    def check_image_quality(self, image_path):
+    def check_image_quality(self, image_path, file_size=None):
         """Check if image meets quality standards"""
         try:
-            # Check file size (too small = low quality)
-            file_size = os.path.getsize(image_path)
+            # Check file size (too small = low quality); reuse the caller's stat if given
+            if file_size is None:
+                file_size = os.path.getsize(image_path)
             if file_size < 50000:  # Less than 50KB
                 return False, "File too small"
             
@@ -164,6 +165,7 @@ class ImageOrganizer:
     
     def analyze_image(self, image_path):
         """Comprehensive image analysis"""
+        file_size = os.path.getsize(image_path)
         results = {
             'filename': image_path.name,
             'quality_passed': False,
@@ -172,12 +174,12 @@ class ImageOrganizer:
             'quality_reason': '',
             'text_reason': '',
             'extracted_text': '',
-            'file_size': os.path.getsize(image_path),
+            'file_size': file_size,
             'timestamp': datetime.now().isoformat()
         }
         
         # Check image quality
-        quality_ok, quality_reason = self.check_image_quality(image_path)
+        quality_ok, quality_reason = self.check_image_quality(image_path, file_size)
         results['quality_passed'] = quality_ok
         results['quality_reason'] = quality_reason
         
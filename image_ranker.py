@@ -9,12 +9,17 @@ import json
 import cv2
 import numpy as np
 from pathlib import Path
-from PIL import Image, ImageStat
 import random
 from datetime import datetime
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from collections import Counter
 
+# Bump when scoring changes so rankings cached in earlier reports are recomputed
+RANKING_CACHE_VERSION = 3
+
+# Above this many pixels, dominant colors are found with mini-batch k-means
+MINIBATCH_KMEANS_THRESHOLD = 20000
+
 class ImageRanker:
     def __init__(self, images_dir="images"):
         self.images_dir = Path(images_dir)
@@ -26,10 +31,16 @@ class ImageRanker:
         for dir_path in [self.ranked_dir, self.selected_dir]:
             dir_path.mkdir(exist_ok=True)
     
+    def load_image(self, image):
+        """Return a decoded BGR image, reading from disk only if given a path"""
+        if isinstance(image, np.ndarray):
+            return image
+        return cv2.imread(str(image))
+    
     def calculate_image_sharpness(self, image_path):
         """Calculate image sharpness using Laplacian variance"""
         try:
-            image = cv2.imread(str(image_path))
+            image = self.load_image(image_path)
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
             return laplacian_var
@@ -39,42 +50,50 @@ class ImageRanker:
     def calculate_color_diversity(self, image_path):
         """Calculate color diversity score"""
         try:
-            with Image.open(image_path) as img:
-                # Convert to RGB and get pixel data
-                img_rgb = img.convert('RGB')
-                pixels = list(img_rgb.getdata())
-                
-                # Use KMeans to find dominant colors
-                pixels_array = np.array(pixels)
-                kmeans = KMeans(n_clusters=min(8, len(set(pixels))), random_state=42, n_init=10)
-                kmeans.fit(pixels_array)
-                
-                # Calculate color diversity based on cluster centers
-                centers = kmeans.cluster_centers_
-                diversity_score = 0
-                
-                for i, center1 in enumerate(centers):
-                    for j, center2 in enumerate(centers[i+1:], i+1):
-                        # Euclidean distance in RGB space
-                        distance = np.sqrt(np.sum((center1 - center2) ** 2))
-                        diversity_score += distance
-                
-                return diversity_score / len(centers) if len(centers) > 1 else 0
+            # View pixel data as an (N, 3) array (channel order doesn't affect distances)
+            image = self.load_image(image_path)
+            pixels_array = image.reshape(-1, 3)
+
+            # Count distinct colors on packed 24-bit values instead of a set of tuples
+            packed = (pixels_array[:, 0].astype(np.uint32) << 16) | \
+                     (pixels_array[:, 1].astype(np.uint32) << 8) | pixels_array[:, 2]
+            unique_colors = np.unique(packed).size
+
+            # Use KMeans to find dominant colors; full-resolution images use the
+            # mini-batch variant so cost doesn't grow with pixel count
+            n_clusters = min(8, unique_colors)
+            if len(pixels_array) > MINIBATCH_KMEANS_THRESHOLD:
+                kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=4096, n_init=3,
+                                         max_iter=20, random_state=42)
+            else:
+                kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+            kmeans.fit(pixels_array)
+
+            # Calculate color diversity based on cluster centers:
+            # sum of pairwise Euclidean distances in RGB space
+            centers = kmeans.cluster_centers_
+            if len(centers) <= 1:
+                return 0
+
+            deltas = centers[:, np.newaxis, :] - centers[np.newaxis, :, :]
+            distances = np.sqrt(np.sum(deltas ** 2, axis=-1))
+            diversity_score = distances[np.triu_indices(len(centers), k=1)].sum()
+
+            return diversity_score / len(centers)
         except:
             return 0
     
-    def calculate_composition_score(self, image_path):
+    def calculate_composition_score(self, image_path, edges=None):
         """Calculate composition quality using rule of thirds and edge detection"""
         try:
-            image = cv2.imread(str(image_path))
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Edge detection
-            edges = cv2.Canny(gray, 50, 150)
+            # Edge detection (reuse precomputed edges when provided)
+            if edges is None:
+                gray = cv2.cvtColor(self.load_image(image_path), cv2.COLOR_BGR2GRAY)
+                edges = cv2.Canny(gray, 50, 150)
             edge_density = np.sum(edges > 0) / edges.size
             
             # Rule of thirds - check if important elements are at intersection points
-            h, w = gray.shape
+            h, w = edges.shape
             
             # Define rule of thirds grid
             third_h, third_w = h // 3, w // 3
@@ -98,32 +117,38 @@ class ImageRanker:
         except:
             return 0
     
-    def calculate_contrast_score(self, image_path):
+    def calculate_contrast_score(self, image_path, gray=None):
         """Calculate image contrast score"""
         try:
-            with Image.open(image_path) as img:
-                # Convert to grayscale and calculate standard deviation
-                grayscale = img.convert('L')
-                stat = ImageStat.Stat(grayscale)
-                return stat.stddev[0]  # Standard deviation as contrast measure
+            # Convert to grayscale and use standard deviation as contrast measure
+            if gray is None:
+                gray = cv2.cvtColor(self.load_image(image_path), cv2.COLOR_BGR2GRAY)
+            return float(gray.std())
         except:
             return 0
     
-    def detect_problematic_content(self, image_path):
-        """Detect potentially problematic content that could cause bad videos"""
+    def detect_problematic_content(self, image_path, laplacian_var=None, edges=None):
+        """Detect potentially problematic content that could cause bad videos
+        
+        laplacian_var and edges may be passed in when the caller has already
+        computed them (see rank_image) to avoid repeating the same passes.
+        """
         try:
-            image = cv2.imread(str(image_path))
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            image = self.load_image(image_path)
+            if laplacian_var is None or edges is None:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             
             problems = []
             
             # Check for motion blur (could indicate movement)
-            laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+            if laplacian_var is None:
+                laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
             if laplacian_var < 50:  # Very blurry
                 problems.append("motion_blur")
             
             # Check for unusual orientations
-            edges = cv2.Canny(gray, 50, 150)
+            if edges is None:
+                edges = cv2.Canny(gray, 50, 150)
             lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=100)
             
             if lines is not None:
@@ -153,12 +178,22 @@ class ImageRanker:
     def rank_image(self, image_path):
         """Calculate comprehensive ranking score for an image"""
         try:
+            # Decode once and share the pixels across all metrics
+            image = self.load_image(image_path)
+            if image is None:
+                raise ValueError(f"Could not decode image: {image_path}")
+            
+            # Grayscale, Laplacian variance and Canny edges are each computed once
+            # and shared by the metrics that need them
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+            edges = cv2.Canny(gray, 50, 150)
+            
             # Calculate individual metrics
-            sharpness = self.calculate_image_sharpness(image_path)
-            color_diversity = self.calculate_color_diversity(image_path)
-            composition = self.calculate_composition_score(image_path)
-            contrast = self.calculate_contrast_score(image_path)
-            problems = self.detect_problematic_content(image_path)
+            color_diversity = self.calculate_color_diversity(image)
+            composition = self.calculate_composition_score(image, edges=edges)
+            contrast = self.calculate_contrast_score(image, gray=gray)
+            problems = self.detect_problematic_content(image, laplacian_var=sharpness, edges=edges)
             
             # Normalize scores (rough normalization)
             sharpness_norm = min(sharpness / 1000, 1.0)  # Cap at 1000
@@ -178,6 +213,8 @@ class ImageRanker:
             problem_penalty = len(problems) * 0.1
             final_score = max(0, base_score - problem_penalty)
             
+            file_stat = os.stat(image_path)
+            
             return {
                 'filename': image_path.name,
                 'final_score': final_score,
@@ -186,7 +223,9 @@ class ImageRanker:
                 'composition': composition,
                 'contrast': contrast,
                 'problems': problems,
-                'file_size': os.path.getsize(image_path),
+                'file_size': file_stat.st_size,
+                'mtime_ns': file_stat.st_mtime_ns,
+                'cache_version': RANKING_CACHE_VERSION,
                 'timestamp': datetime.now().isoformat()
             }
         except Exception as e:
@@ -202,13 +241,30 @@ class ImageRanker:
         approved_images = list(self.approved_dir.glob("*.png"))
         rankings = []
         
+        # Reuse scores from the latest report for files that haven't changed
+        cached_rankings = self.load_cached_rankings()
+        reused_count = 0
+        
         print(f"Ranking {len(approved_images)} approved images...")
         
         for i, image_path in enumerate(approved_images, 1):
+            cached = cached_rankings.get(image_path.name)
+            if cached:
+                file_stat = image_path.stat()
+                if (cached.get('file_size') == file_stat.st_size and
+                        cached.get('mtime_ns') == file_stat.st_mtime_ns):
+                    print(f"Ranking {i}/{len(approved_images)}: {image_path.name} (cached)")
+                    rankings.append(cached)
+                    reused_count += 1
+                    continue
+            
             print(f"Ranking {i}/{len(approved_images)}: {image_path.name}")
             ranking = self.rank_image(image_path)
             rankings.append(ranking)
         
+        if reused_count:
+            print(f"♻️ Reused {reused_count} unchanged rankings from previous run")
+        
         # Sort by final score
         rankings.sort(key=lambda x: x['final_score'], reverse=True)
         
@@ -229,18 +285,41 @@ class ImageRanker:
         
         return rankings
     
+    def load_latest_rankings(self):
+        """Load the most recent image_rankings_*.json report, or None if there is none"""
+        ranking_files = list(self.images_dir.glob("image_rankings_*.json"))
+        if not ranking_files:
+            return None
+        
+        latest_file = max(ranking_files, key=os.path.getctime)
+        with open(latest_file, 'r') as f:
+            return json.load(f)
+    
+    def load_cached_rankings(self):
+        """Load the latest saved rankings keyed by filename, for reuse on unchanged images"""
+        try:
+            rankings = self.load_latest_rankings()
+        except (OSError, ValueError):
+            return {}
+        
+        # A missing, corrupt or unexpectedly shaped report just means nothing is cached
+        if not isinstance(rankings, list):
+            return {}
+        
+        return {
+            r['filename']: r for r in rankings
+            if isinstance(r, dict) and 'filename' in r
+            and r.get('cache_version') == RANKING_CACHE_VERSION and 'error' not in r
+        }
+    
     def select_for_video_creation(self, rankings=None, min_score=0.5, max_selections=20):
         """Select best images for video creation"""
         if rankings is None:
             # Load latest rankings
-            ranking_files = list(self.images_dir.glob("image_rankings_*.json"))
-            if not ranking_files:
+            rankings = self.load_latest_rankings()
+            if rankings is None:
                 print("No rankings found. Run ranking first.")
                 return []
-            
-            latest_file = max(ranking_files, key=os.path.getctime)
-            with open(latest_file, 'r') as f:
-                rankings = json.load(f)
         
         # Filter by minimum score and exclude problematic images
         suitable_images = []
@@ -298,51 +377,61 @@ class ImageRanker:
         if len(candidates) <= max_count:
             return candidates
         
+        # Tokenize each filename once instead of on every pairwise comparison
+        name_tokens = {c['filename']: self.tokenize_name(c['filename']) for c in candidates}
+        
         # Start with highest scoring image
         selected = [candidates[0]]
         remaining = candidates[1:]
         
+        def pair_diversity(candidate, selected_img):
+            # Simple diversity based on filename patterns and scores
+            name_similarity = self.token_similarity(
+                name_tokens[candidate['filename']], name_tokens[selected_img['filename']]
+            )
+            score_diff = abs(candidate['final_score'] - selected_img['final_score'])
+            return (1 - name_similarity) + score_diff
+        
+        # Running diversity score per remaining candidate (higher = more different
+        # from selected); only the newest pick is added each round, so each pair
+        # is scored once rather than re-summing over every selected image
+        diversity_scores = [pair_diversity(candidate, selected[0]) for candidate in remaining]
+        
         # Greedily select images that are different from already selected ones
         while len(selected) < max_count and remaining:
-            best_candidate = None
+            best_index = 0
             best_diversity_score = -1
             
-            for candidate in remaining:
-                # Calculate diversity score (higher = more different from selected)
-                diversity_score = 0
-                
-                for selected_img in selected:
-                    # Simple diversity based on filename patterns and scores
-                    name_similarity = self.calculate_name_similarity(
-                        candidate['filename'], selected_img['filename']
-                    )
-                    score_diff = abs(candidate['final_score'] - selected_img['final_score'])
-                    
-                    diversity_score += (1 - name_similarity) + score_diff
-                
+            for i, diversity_score in enumerate(diversity_scores):
                 if diversity_score > best_diversity_score:
                     best_diversity_score = diversity_score
-                    best_candidate = candidate
+                    best_index = i
+            
+            best_candidate = remaining.pop(best_index)
+            diversity_scores.pop(best_index)
+            selected.append(best_candidate)
             
-            if best_candidate:
-                selected.append(best_candidate)
-                remaining.remove(best_candidate)
+            for i, candidate in enumerate(remaining):
+                diversity_scores[i] += pair_diversity(candidate, best_candidate)
         
         return selected
     
-    def calculate_name_similarity(self, name1, name2):
-        """Calculate similarity between image names to avoid similar content"""
-        # Extract base patterns (location, item type, etc.)
-        parts1 = name1.lower().replace('_', ' ').split()
-        parts2 = name2.lower().replace('_', ' ').split()
-        
-        common_parts = set(parts1) & set(parts2)
-        total_unique_parts = len(set(parts1) | set(parts2))
+    def tokenize_name(self, name):
+        """Extract base patterns (location, item type, etc.) from an image name"""
+        return frozenset(name.lower().replace('_', ' ').split())
+    
+    def token_similarity(self, parts1, parts2):
+        """Jaccard similarity between two tokenized image names"""
+        total_unique_parts = len(parts1 | parts2)
         
         if total_unique_parts == 0:
             return 1.0
         
-        return len(common_parts) / total_unique_parts
+        return len(parts1 & parts2) / total_unique_parts
+    
+    def calculate_name_similarity(self, name1, name2):
+        """Calculate similarity between image names to avoid similar content"""
+        return self.token_similarity(self.tokenize_name(name1), self.tokenize_name(name2))
     
     def get_stats(self):
         """Get current statistics - uses proper images/ subdirectory patterns"""
@@ -352,12 +441,8 @@ class ImageRanker:
         }
         
         # Get latest rankings if available
-        ranking_files = list(self.images_dir.glob("image_rankings_*.json"))
-        if ranking_files:
-            latest_file = max(ranking_files, key=os.path.getctime)
-            with open(latest_file, 'r') as f:
-                rankings = json.load(f)
-            
+        rankings = self.load_latest_rankings()
+        if rankings:
             stats['total_ranked'] = len(rankings)
             stats['avg_score'] = sum(r['final_score'] for r in rankings) / len(rankings)
             stats['high_quality'] = sum(1 for r in rankings if r['final_score'] > 0.7)
@@ -7,6 +7,8 @@ Generates videos from selected high-quality images with improved prompts and qua
 import os
 import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import base64
 from pathlib import Path
@@ -14,6 +16,38 @@ from datetime import datetime
 import random
 from runwayml import RunwayML
 
+# Task polling intervals (seconds): start short so fast renders are picked up
+# promptly, then back off geometrically so long renders don't hammer the API
+POLL_INITIAL_DELAY = 2.0
+POLL_BACKOFF_FACTOR = 1.5
+POLL_MAX_DELAY = 30.0
+
+# HTTP connection pooling and retries for Runway API calls and video downloads.
+# raise_on_status=False hands the final 5xx response back to the caller so the
+# existing status_code checks still decide what happens
+HTTP_POOL_SIZE = 16
+HTTP_RETRIES = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504],
+                     raise_on_status=False)
+
+# Write buffer for downloaded videos, so multi-MB files go to disk in few syscalls
+DOWNLOAD_BUFFER_SIZE = 1 << 20
+
+# Bytes pulled from the HTTP stream per iteration when downloading videos
+DOWNLOAD_CHUNK_SIZE = 1 << 18
+
+def _write_json_atomic(path, data):
+    """Serialize data in one write to a temp file, then rename it over path"""
+    payload = json.dumps(data, indent=2)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 class IntelligentVideoGenerator:
     def __init__(self, images_dir="video_queue"):
         self.images_dir = Path(images_dir)
@@ -28,6 +62,13 @@ class IntelligentVideoGenerator:
         else:
             self.client = None
         
+        # Shared HTTP session so API polling and downloads reuse keep-alive connections
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE,
+                              max_retries=HTTP_RETRIES)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+        
         # Video generation parameters
         self.video_params = {
             "duration": 4,  # seconds
@@ -82,6 +123,16 @@ class IntelligentVideoGenerator:
             "wine": "product_focus"
         }
     
+    def close(self):
+        """Release pooled HTTP connections"""
+        self.http.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
     def detect_content_type(self, content_source):
         """Detect content type from filename or descriptor tokens to choose appropriate motion
         
@@ -302,8 +353,7 @@ class IntelligentVideoGenerator:
         
         # Save task queue to file for persistence
         queue_file = self.video_outputs_dir / f"task_queue_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(queue_file, 'w') as f:
-            json.dump(task_queue, f, indent=2)
+        _write_json_atomic(queue_file, task_queue)
         
         successful_tasks = sum(1 for item in task_queue if item.get('task_id'))
         print(f"\n🎬 TASK CREATION COMPLETE:")
@@ -353,7 +403,7 @@ class IntelligentVideoGenerator:
             'X-Runway-Version': '2024-09-13'
         }
         
-        response = requests.post(generation_url, json=payload, headers=headers)
+        response = self.http.post(generation_url, json=payload, headers=headers)
         
         if response.status_code == 200:
             return response.json()['id']
@@ -365,30 +415,40 @@ class IntelligentVideoGenerator:
         status_url = f"{self.base_url}/tasks/{task_id}"
         headers = {'Authorization': f'Bearer {self.api_key}'}
         
-        response = requests.get(status_url, headers=headers)
+        response = self.http.get(status_url, headers=headers)
         
         if response.status_code == 200:
             return response.json()
         else:
             raise Exception(f"Status check failed: {response.status_code} - {response.text}")
     
-    def download_video(self, video_url, output_path):
+    def download_video(self, video_url, output_path, chunk_size=DOWNLOAD_CHUNK_SIZE):
         """Download generated video"""
-        response = requests.get(video_url, stream=True)
-        
-        if response.status_code == 200:
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+        # Closing the streamed response hands its connection back to the session pool
+        with self.http.get(video_url, stream=True) as response:
+            if response.status_code != 200:
+                return False
+            
+            # Write to a sibling temp file and rename it into place, so an interrupted
+            # download never leaves a truncated .mp4 that looks complete
+            tmp_path = f"{output_path}.part"
+            try:
+                with open(tmp_path, 'wb', buffering=DOWNLOAD_BUFFER_SIZE) as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                os.replace(tmp_path, output_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
             return True
-        else:
-            return False
     
     def wait_for_completion(self, task_id, max_wait_time=300):
-        """Wait for video generation to complete"""
+        """Wait for video generation to complete, using the same backoff as _wait_for_task"""
         start_time = time.time()
+        delay = POLL_INITIAL_DELAY
         
-        while time.time() - start_time < max_wait_time:
+        while True:
             try:
                 status = self.check_generation_status(task_id)
                 
@@ -398,14 +458,47 @@ class IntelligentVideoGenerator:
                     error_msg = status.get('failure_reason', 'Unknown error')
                     raise Exception(f"Generation failed: {error_msg}")
                 
-                print(f"Status: {status['status']}, waiting...")
-                time.sleep(10)
+                message = f"Status: {status['status']}"
                 
             except Exception as e:
-                print(f"Error checking status: {e}")
-                time.sleep(5)
+                message = f"Error checking status: {e}"
+            
+            remaining = max_wait_time - (time.time() - start_time)
+            if remaining <= 0:
+                raise Exception(f"Generation timed out after {max_wait_time} seconds")
+            
+            print(f"{message}, waiting {min(delay, remaining):.0f}s...")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * POLL_BACKOFF_FACTOR, POLL_MAX_DELAY)
+    
+    def _wait_for_task(self, task_id, max_wait_time=300):
+        """Poll a RunwayML task until it succeeds, backing off between retrievals
+        
+        Returns:
+            The SUCCEEDED task object
         
-        raise Exception(f"Generation timed out after {max_wait_time} seconds")
+        Raises:
+            Exception if the task fails or does not finish within max_wait_time
+        """
+        start_time = time.time()
+        delay = POLL_INITIAL_DELAY
+        
+        while True:
+            task = self.client.tasks.retrieve(task_id)
+            
+            if task.status == "SUCCEEDED":
+                return task
+            elif task.status == "FAILED":
+                error_msg = getattr(task, 'failure_reason', 'Unknown error')
+                raise Exception(f"Generation failed: {error_msg}")
+            
+            remaining = max_wait_time - (time.time() - start_time)
+            if remaining <= 0:
+                raise Exception(f"Generation timed out after {max_wait_time} seconds")
+            
+            print(f"Status: {task.status}, waiting {min(delay, remaining):.0f}s...")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * POLL_BACKOFF_FACTOR, POLL_MAX_DELAY)
     
     def generate_video_from_image(self, image_path, ranking_data=None):
         """Generate video from a single image using RunwayML SDK"""
@@ -425,53 +518,37 @@ class IntelligentVideoGenerator:
             print("⏱️ Waiting for completion...")
             task_id = task.id
             
-            # Poll for completion
-            max_wait_time = 300  # 5 minutes
-            start_time = time.time()
+            # Poll for completion (5 minute limit)
+            task = self._wait_for_task(task_id, max_wait_time=300)
             
-            while time.time() - start_time < max_wait_time:
-                # Retrieve task status
-                task = self.client.tasks.retrieve(task_id)
-                
-                if task.status == "SUCCEEDED":
-                    # Download video
-                    video_filename = f"{image_path.stem}_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
-                    output_path = self.video_outputs_dir / video_filename
-                    
-                    print("💾 Downloading video...")
-                    
-                    # Get video URL from task output
-                    video_url = task.output[0]  # Assuming output contains video URL
-                    
-                    if self.download_video(video_url, output_path):
-                        print(f"✅ Video saved: {output_path}")
-                        return {
-                            'success': True,
-                            'input_image': str(image_path),
-                            'output_video': str(output_path),
-                            'prompt': prompt,
-                            'task_id': task_id,
-                            'ranking_data': ranking_data,
-                            'timestamp': datetime.now().isoformat()
-                        }
-                    else:
-                        return {
-                            'success': False,
-                            'error': 'Failed to download video',
-                            'input_image': str(image_path),
-                            'prompt': prompt,
-                            'task_id': task_id
-                        }
-                
-                elif task.status == "FAILED":
-                    error_msg = getattr(task, 'failure_reason', 'Unknown error')
-                    raise Exception(f"Generation failed: {error_msg}")
-                
-                print(f"Status: {task.status}, waiting...")
-                time.sleep(10)
+            # Download video
+            video_filename = f"{image_path.stem}_video_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
+            output_path = self.video_outputs_dir / video_filename
+            
+            print("💾 Downloading video...")
             
-            # Timeout
-            raise Exception(f"Generation timed out after {max_wait_time} seconds")
+            # Get video URL from task output
+            video_url = task.output[0]  # Assuming output contains video URL
+            
+            if self.download_video(video_url, output_path):
+                print(f"✅ Video saved: {output_path}")
+                return {
+                    'success': True,
+                    'input_image': str(image_path),
+                    'output_video': str(output_path),
+                    'prompt': prompt,
+                    'task_id': task_id,
+                    'ranking_data': ranking_data,
+                    'timestamp': datetime.now().isoformat()
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': 'Failed to download video',
+                    'input_image': str(image_path),
+                    'prompt': prompt,
+                    'task_id': task_id
+                }
         
         except Exception as e:
             print(f"❌ Error generating video: {e}")
@@ -505,67 +582,51 @@ class IntelligentVideoGenerator:
             print("⏱️ Waiting for completion...")
             task_id = task.id
             
-            # Poll for completion
-            max_wait_time = 300  # 5 minutes
-            start_time = time.time()
+            # Poll for completion (5 minute limit)
+            task = self._wait_for_task(task_id, max_wait_time=300)
             
-            while time.time() - start_time < max_wait_time:
-                # Retrieve task status
-                task = self.client.tasks.retrieve(task_id)
-                
-                if task.status == "SUCCEEDED":
-                    # Create enhanced video filename using metadata
-                    descriptor = metadata['descriptor_tokens']
-                    platform = metadata['platform_suffix']
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    
-                    if platform:
-                        video_filename = f"{descriptor}_{platform}_video_{timestamp}.mp4"
-                    else:
-                        video_filename = f"{descriptor}_video_{timestamp}.mp4"
-                    
-                    output_path = self.video_outputs_dir / video_filename
-                    
-                    print("💾 Downloading video...")
-                    print(f"📝 Enhanced filename: {video_filename}")
-                    
-                    # Get video URL from task output
-                    video_url = task.output[0]  # Assuming output contains video URL
-                    
-                    if self.download_video(video_url, output_path):
-                        print(f"✅ Video saved: {output_path}")
-                        return {
-                            'success': True,
-                            'input_image': str(image_path),
-                            'output_video': str(output_path),
-                            'video_filename': video_filename,
-                            'descriptor_tokens': descriptor,
-                            'platform_suffix': platform,
-                            'final_score': metadata['final_score'],
-                            'prompt': prompt,
-                            'task_id': task_id,
-                            'ranking_data': metadata['ranking_data'],
-                            'timestamp': datetime.now().isoformat()
-                        }
-                    else:
-                        return {
-                            'success': False,
-                            'error': 'Failed to download video',
-                            'input_image': str(image_path),
-                            'prompt': prompt,
-                            'task_id': task_id,
-                            'metadata': metadata
-                        }
-                
-                elif task.status == "FAILED":
-                    error_msg = getattr(task, 'failure_reason', 'Unknown error')
-                    raise Exception(f"Generation failed: {error_msg}")
-                
-                print(f"Status: {task.status}, waiting...")
-                time.sleep(10)
+            # Create enhanced video filename using metadata
+            descriptor = metadata['descriptor_tokens']
+            platform = metadata['platform_suffix']
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            
+            if platform:
+                video_filename = f"{descriptor}_{platform}_video_{timestamp}.mp4"
+            else:
+                video_filename = f"{descriptor}_video_{timestamp}.mp4"
+            
+            output_path = self.video_outputs_dir / video_filename
+            
+            print("💾 Downloading video...")
+            print(f"📝 Enhanced filename: {video_filename}")
             
-            # Timeout
-            raise Exception(f"Generation timed out after {max_wait_time} seconds")
+            # Get video URL from task output
+            video_url = task.output[0]  # Assuming output contains video URL
+            
+            if self.download_video(video_url, output_path):
+                print(f"✅ Video saved: {output_path}")
+                return {
+                    'success': True,
+                    'input_image': str(image_path),
+                    'output_video': str(output_path),
+                    'video_filename': video_filename,
+                    'descriptor_tokens': descriptor,
+                    'platform_suffix': platform,
+                    'final_score': metadata['final_score'],
+                    'prompt': prompt,
+                    'task_id': task_id,
+                    'ranking_data': metadata['ranking_data'],
+                    'timestamp': datetime.now().isoformat()
+                }
+            else:
+                return {
+                    'success': False,
+                    'error': 'Failed to download video',
+                    'input_image': str(image_path),
+                    'prompt': prompt,
+                    'task_id': task_id,
+                    'metadata': metadata
+                }
         
         except Exception as e:
             print(f"❌ Error generating video: {e}")
@@ -582,16 +643,24 @@ class IntelligentVideoGenerator:
         # Check multiple possible locations for ranking files
         search_dirs = [Path("images"), self.images_dir, Path("video_queue"), Path(".")]
         
+        # Single scandir pass per directory; keep (ctime, path) pairs so the
+        # stat result from the DirEntry is reused when picking the latest file
         all_ranking_files = []
         for search_dir in search_dirs:
-            ranking_files = list(search_dir.glob("*ranking*.json"))
-            all_ranking_files.extend(ranking_files)
-        
+            try:
+                with os.scandir(search_dir) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if 'ranking' in name and name.endswith('.json') and entry.is_file():
+                            all_ranking_files.append((entry.stat().st_ctime, entry.path))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
         if not all_ranking_files:
             return {}
-        
+
         # Find the most recent ranking file
-        latest_file = max(all_ranking_files, key=os.path.getctime)
+        latest_file = max(all_ranking_files)[1]
         
         with open(latest_file, 'r') as f:
             rankings = json.load(f)
@@ -705,8 +774,7 @@ class IntelligentVideoGenerator:
         
         # Save results
         results_file = self.video_outputs_dir / f"video_generation_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(results_file, 'w') as f:
-            json.dump(results, f, indent=2)
+        _write_json_atomic(results_file, results)
         
         print(f"\n🎬 VIDEO GENERATION COMPLETE:")
         print(f"✅ Successful: {successful_videos}/{len(images_to_process)}")
@@ -716,18 +784,27 @@ class IntelligentVideoGenerator:
     
     def get_stats(self):
         """Get video generation statistics - uses proper images/ subdirectory patterns"""
-        video_files = list(self.video_outputs_dir.glob("*.mp4"))
-        result_files = list(self.video_outputs_dir.glob("video_generation_results_*.json"))
-        
+        # One directory pass for both videos and result reports; result files
+        # are decorated with their ctime once instead of stat'ing per comparison
+        video_count = 0
+        result_files = []
+        with os.scandir(self.video_outputs_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.endswith('.mp4'):
+                    video_count += 1
+                elif name.startswith('video_generation_results_') and name.endswith('.json'):
+                    result_files.append((entry.stat().st_ctime, entry.path))
+
         stats = {
-            'total_videos': len(video_files),
+            'total_videos': video_count,
             'selected_images': len(list(self.selected_dir.glob("*.png"))),
             'result_reports': len(result_files)
         }
-        
+
         # Get success rate from latest results
         if result_files:
-            latest_results = max(result_files, key=os.path.getctime)
+            latest_results = max(result_files)[1]
             with open(latest_results, 'r') as f:
                 results = json.load(f)
             
@@ -738,21 +815,21 @@ class IntelligentVideoGenerator:
         return stats
 
 def main():
-    generator = IntelligentVideoGenerator()
-    
-    print("🎬 Starting Intelligent Video Generation...")
-    
-    # Check if API key is set
-    if not generator.api_key:
-        print("❌ RUNWAYML_API_SECRET environment variable not set")
-        print("Please set your Runway API key: export RUNWAYML_API_SECRET='your_key_here'")
-        return
-    
-    # Generate videos from selected images
-    results = generator.generate_videos_from_selected(max_videos=10)
+    with IntelligentVideoGenerator() as generator:
+        print("🎬 Starting Intelligent Video Generation...")
+        
+        # Check if API key is set
+        if not generator.api_key:
+            print("❌ RUNWAYML_API_SECRET environment variable not set")
+            print("Please set your Runway API key: export RUNWAYML_API_SECRET='your_key_here'")
+            return
+        
+        # Generate videos from selected images
+        results = generator.generate_videos_from_selected(max_videos=10)
+        
+        # Show final stats
+        stats = generator.get_stats()
     
-    # Show final stats
-    stats = generator.get_stats()
     print(f"\n📊 FINAL STATISTICS:")
     print(f"🎬 Total videos: {stats['total_videos']}")
     print(f"📸 Selected images: {stats['selected_images']}")
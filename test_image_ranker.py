@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the ranking cache in image_ranker.py.
+"""
+
+import unittest
+import tempfile
+import shutil
+import json
+from pathlib import Path
+from unittest.mock import patch
+import sys
+import os
+
+# Add current directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from image_ranker import ImageRanker, RANKING_CACHE_VERSION
+
+
+class TestRankingCache(unittest.TestCase):
+    """Test cases for reusing rankings from the latest saved report."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        (self.test_dir / "approved").mkdir()
+        self.ranker = ImageRanker(images_dir=str(self.test_dir))
+
+        self.image_path = self.test_dir / "approved" / "sunset_beach_ig.png"
+        self.image_path.write_bytes(b"fake image data")
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.test_dir)
+
+    def make_entry(self, **overrides):
+        """Build a ranking entry matching the current state of the test image."""
+        file_stat = self.image_path.stat()
+        entry = {
+            'filename': self.image_path.name,
+            'path': str(self.image_path),
+            'final_score': 0.8,
+            'problems': [],
+            'file_size': file_stat.st_size,
+            'mtime_ns': file_stat.st_mtime_ns,
+            'cache_version': RANKING_CACHE_VERSION
+        }
+        entry.update(overrides)
+        return entry
+
+    def write_report(self, content):
+        """Write the only (and therefore latest) rankings report."""
+        report = self.test_dir / "image_rankings_20240101_000000.json"
+        if isinstance(content, str):
+            report.write_text(content)
+        else:
+            report.write_text(json.dumps(content))
+
+    def fresh_ranking(self, image_path):
+        """Stand-in for rank_image so tests don't need real image decoding."""
+        return {'filename': Path(image_path).name, 'final_score': 0.5, 'problems': []}
+
+    def test_hit_when_size_and_mtime_unchanged(self):
+        """Test that an unchanged image reuses its cached ranking."""
+        self.write_report([self.make_entry()])
+
+        with patch.object(ImageRanker, 'rank_image', side_effect=self.fresh_ranking) as mock_rank:
+            rankings = self.ranker.rank_all_approved_images()
+
+        mock_rank.assert_not_called()
+        self.assertEqual(rankings[0]['final_score'], 0.8)
+
+    def test_miss_after_modification(self):
+        """Test that a modified image is ranked again."""
+        self.write_report([self.make_entry()])
+        self.image_path.write_bytes(b"different, longer fake image data")
+
+        with patch.object(ImageRanker, 'rank_image', side_effect=self.fresh_ranking) as mock_rank:
+            rankings = self.ranker.rank_all_approved_images()
+
+        mock_rank.assert_called_once_with(self.image_path)
+        self.assertEqual(rankings[0]['final_score'], 0.5)
+
+    def test_miss_on_cache_version_mismatch(self):
+        """Test that entries from an older scoring version are not reused."""
+        self.write_report([self.make_entry(cache_version=RANKING_CACHE_VERSION - 1)])
+
+        self.assertEqual(self.ranker.load_cached_rankings(), {})
+
+        with patch.object(ImageRanker, 'rank_image', side_effect=self.fresh_ranking) as mock_rank:
+            self.ranker.rank_all_approved_images()
+
+        mock_rank.assert_called_once_with(self.image_path)
+
+    def test_skips_error_entries(self):
+        """Test that failed rankings are never served from the cache."""
+        good = self.make_entry(filename="good_image.png")
+        failed = self.make_entry(error="Could not read image")
+        self.write_report([good, failed])
+
+        cached = self.ranker.load_cached_rankings()
+
+        self.assertIn("good_image.png", cached)
+        self.assertNotIn(self.image_path.name, cached)
+
+    def test_no_report(self):
+        """Test that having no saved report yields an empty cache."""
+        self.assertIsNone(self.ranker.load_latest_rankings())
+        self.assertEqual(self.ranker.load_cached_rankings(), {})
+
+    def test_corrupt_latest_report(self):
+        """Test that a corrupt latest report yields an empty cache."""
+        self.write_report("{not valid json")
+
+        self.assertEqual(self.ranker.load_cached_rankings(), {})
+
+    def test_empty_latest_report(self):
+        """Test that an empty or non-list latest report yields an empty cache."""
+        for content in ("", [], {}):
+            self.write_report(content)
+            self.assertEqual(self.ranker.load_cached_rankings(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()